@@ -1,41 +1,318 @@
 import streamlit as st
 import time
 import os
+import tempfile
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from src.processor import PDFProcessor
 from src.embedding import EmbeddingManager
 from src.chat import ChatManager
 from src.config import Config
+from src.semantic_cache import SemanticCache
+from src.query_validator import needs_retrieval
 from langchain.schema import Document
 
 st.set_page_config(page_title="PDF-RAG Chatbot", page_icon="🧠", layout="wide")
 
+@st.cache_resource
+def get_processor():
+    """
+    Get the PDF processor shared by all sessions.
+    """
+    return PDFProcessor()
+
+@st.cache_resource
+def get_embedding_model():
+    """
+    Get the embedding model shared by all sessions.
+    The model is primed once so the first real query is fast.
+    """
+    embedding_model = EmbeddingManager.load_embedding_model()
+    embedding_model.embed_query("warmup")
+    return embedding_model
+
+def _warm_components(components, ready):
+    """
+    Construct the heavy components in a background thread.
+    Runs outside the script thread, so results go into a plain dict instead of st.session_state.
+    
+    Args:
+        components: Dict that receives the constructed components (or an "error" message)
+        ready: Event set once construction has finished
+    """
+    try:
+        components["processor"] = get_processor()
+        
+        # The model is shared; the vector store and retriever stay per session
+        components["embedding_manager"] = EmbeddingManager(get_embedding_model())
+        
+        # Conversation memory is per session, so the chat manager is not shared
+        components["chat_manager"] = ChatManager(Config.GOOGLE_API_KEY)
+    except Exception as e:
+        components["error"] = str(e)
+    finally:
+        ready.set()
+
+def _collect_components(wait=False):
+    """
+    Move the warmed-up components into session state once they are available.
+    
+    Args:
+        wait: Block until the background warm-up has finished
+        
+    Returns:
+        bool: True if the components are ready, False otherwise
+        
+    Raises:
+        RuntimeError: If the warm-up failed
+    """
+    if st.session_state.ready:
+        return True
+        
+    components, ready = st.session_state.warmup
+    if not ready.wait(timeout=None if wait else 0):
+        return False
+        
+    if "error" in components:
+        raise RuntimeError(f"Error loading models: {components['error']}")
+        
+    st.session_state.processor = components["processor"]
+    st.session_state.embedding_manager = components["embedding_manager"]
+    st.session_state.chat_manager = components["chat_manager"]
+    st.session_state.ready = True
+    return True
+
+@st.fragment(run_every=1)
+def _wait_for_components():
+    """
+    Poll the background warm-up and rerun the app once it has finished.
+    """
+    if _collect_components():
+        st.rerun()
+    st.info("Loading models, chat will be available in a moment...")
+
 def initialize_session_state():
     """
     Initialize the Streamlit session state with the required components.
-    Creates instances of the processor, embedding manager, and chat manager.
+    Starts constructing the processor, embedding manager, and chat manager in the background.
     """
-    if "processor" not in st.session_state:
-        st.session_state.processor = PDFProcessor()
+    # Check if API key is available
+    if not Config.is_valid():
+        st.error("Missing API key. Please check your .env file.")
+        return False
         
-    if "embedding_manager" not in st.session_state:
-        st.session_state.embedding_manager = EmbeddingManager()
+    if "warmup" not in st.session_state:
+        components, ready = {}, threading.Event()
+        threading.Thread(target=_warm_components, args=(components, ready), daemon=True).start()
+        st.session_state.warmup = (components, ready)
+        st.session_state.ready = False
         
-    if "chat_manager" not in st.session_state:
-        # Check if API key is available
-        if not Config.is_valid():
-            st.error("Missing API key. Please check your .env file.")
-            return False
-            
-        st.session_state.chat_manager = ChatManager(Config.GOOGLE_API_KEY)
+    try:
+        _collect_components()
+    except RuntimeError as e:
+        st.error(str(e))
+        return False
         
     if "messages" not in st.session_state:
         st.session_state.messages = []
         
-    if "documents" not in st.session_state:
-        st.session_state.documents = []
+    if "history_archive" not in st.session_state:
+        st.session_state.history_archive = []
+        
+    if "doc_count" not in st.session_state:
+        st.session_state.doc_count = 0
+        
+    if "processed_hashes" not in st.session_state:
+        st.session_state.processed_hashes = set()
+        
+    if "large_files" not in st.session_state:
+        st.session_state.large_files = set()
+        
+    if "semantic_cache" not in st.session_state:
+        st.session_state.semantic_cache = SemanticCache()
         
     return True
 
+def _trim_history():
+    """
+    Keep only the most recent chat messages for rendering.
+    Older messages are moved to st.session_state.history_archive.
+    """
+    overflow = len(st.session_state.messages) - Config.MAX_CHAT_MESSAGES
+    if overflow > 0:
+        st.session_state.history_archive.extend(st.session_state.messages[:overflow])
+        st.session_state.messages = st.session_state.messages[overflow:]
+
+def _spool_to_tempfile(file, chunk_size=None):
+    """
+    Copy an uploaded file to a temporary file on disk in large chunks.
+    
+    Args:
+        file: The uploaded file object
+        chunk_size: Number of bytes per read (defaults to Config.IO_CHUNK_SIZE)
+        
+    Returns:
+        tuple: The temporary file path and the number of bytes copied
+    """
+    chunk_size = chunk_size or Config.IO_CHUNK_SIZE
+    file_size = 0
+    
+    file.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+        try:
+            while chunk := file.read(chunk_size):
+                tmp.write(chunk)
+                file_size += len(chunk)
+        except BaseException:
+            # The caller never sees the path, so remove the partial copy here
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+            
+    return tmp.name, file_size
+
+def _file_hash(file) -> str:
+    """
+    Compute a BLAKE2b digest of a file's contents, reading in large chunks.
+    
+    Args:
+        file: An uploaded PDF file or a file path
+        
+    Returns:
+        str: The hex digest of the file contents
+    """
+    digest = hashlib.blake2b()
+    
+    if isinstance(file, str):  # File path
+        with open(file, 'rb') as f:
+            while chunk := f.read(Config.IO_CHUNK_SIZE):
+                digest.update(chunk)
+    else:  # File object (from uploader)
+        file.seek(0)
+        while chunk := file.read(Config.IO_CHUNK_SIZE):
+            digest.update(chunk)
+        file.seek(0)
+        
+    return digest.hexdigest()
+
+def _index_cache_key(file_hashes) -> str:
+    """
+    Derive the persisted-index key for a set of files.
+    Includes every setting that affects the chunks or the index, so changing
+    any of them never reloads a stale index.
+    
+    Args:
+        file_hashes: Content digests of the indexed files
+        
+    Returns:
+        str: The hex digest identifying the index
+    """
+    settings = [
+        Config.EMBEDDING_MODEL,
+        Config.CHUNK_SIZE,
+        Config.CHUNK_OVERLAP,
+        Config.VECTOR_QUANTIZATION,
+        Config.HNSW_M,
+        Config.HNSW_EF_CONSTRUCTION,
+        Config.HNSW_EF_SEARCH,
+        Config.IVF_THRESHOLD,
+        Config.IVF_INDEX_FACTORY,
+        Config.IVF_NPROBE,
+    ]
+    key_material = "|".join(str(setting) for setting in settings) + "|" + "".join(sorted(file_hashes))
+    return hashlib.blake2b(key_material.encode()).hexdigest()
+
+def _file_name(file) -> str:
+    """
+    Get the display name of an uploaded file or a file path.
+    
+    Args:
+        file: An uploaded PDF file or a file path
+        
+    Returns:
+        str: The file's base name
+    """
+    return os.path.basename(file) if isinstance(file, str) else file.name
+
+def _size_error(file, max_size):
+    """
+    Check a file against the size limit without reading it.
+    
+    Args:
+        file: An uploaded PDF file or a file path
+        max_size: Maximum allowed file size in bytes
+        
+    Returns:
+        str: An error message if the file is too large, None otherwise
+    """
+    # Handle both file objects and file paths; Streamlit reports upload sizes up front
+    if isinstance(file, str):  # File path
+        file_size = os.path.getsize(file)
+        file_name = os.path.basename(file)
+    else:  # File object (from uploader)
+        file_size = getattr(file, "size", None)
+        file_name = file.name
+        
+    if file_size is not None and file_size > max_size:
+        return f"File '{file_name}' is too large ({file_size / (1024**3):.2f} GB). Maximum allowed size is 2GB."
+    return None
+
+def _spool_and_process(processor, file, file_hash, max_size):
+    """
+    Split a single file into document chunks.
+    Runs in a worker thread, so it must not call any Streamlit APIs.
+    
+    Args:
+        processor: The PDFProcessor to use
+        file: An uploaded PDF file or a file path
+        file_hash: BLAKE2b digest of the file, reused as the chunk cache key
+        max_size: Maximum allowed file size in bytes
+        
+    Returns:
+        tuple: The list of document chunks and an error message (None on success)
+    """
+    # Unchanged files come straight from the chunk cache, without spooling the upload
+    documents = processor.load_cached_document(file_hash, file if isinstance(file, str) else file.name)
+    if documents is not None:
+        return documents, None
+        
+    if isinstance(file, str):  # File path
+        # Open file and process
+        with open(file, 'rb', buffering=Config.IO_CHUNK_SIZE) as f:
+            return processor.process_document(f, content_hash=file_hash), None
+            
+    # File object (from uploader): spool to disk so the parser reads from a real file
+    temp_path, file_size = _spool_to_tempfile(file)
+    try:
+        # Catches uploads that did not report their size
+        if file_size > max_size:
+            return [], f"File '{file.name}' is too large ({file_size / (1024**3):.2f} GB). Maximum allowed size is 2GB."
+        
+        # Process each document using LangChain pipeline
+        with open(temp_path, 'rb', buffering=Config.IO_CHUNK_SIZE) as f:
+            return processor.process_document(f, source=file.name, content_hash=file_hash), None
+    finally:
+        os.remove(temp_path)
+
+def _connect_retriever():
+    """
+    Connect the freshly built retriever to the chat manager and select the
+    response generator used by the chat loop.
+    
+    Raises:
+        RuntimeError: If the embedding manager has no retriever
+    """
+    retriever = st.session_state.embedding_manager.retriever
+    if retriever is None:
+        raise RuntimeError("No retriever available after creating embeddings.")
+        
+    # Cached answers refer to the previous document set
+    st.session_state.semantic_cache.clear()
+    
+    st.session_state.chat_manager.set_retriever(retriever)
+    st.session_state.generate = st.session_state.chat_manager.generate_response_stream
+
 def process_documents(files_to_process):
     """
     Process the uploaded PDF documents.
@@ -48,52 +325,106 @@ def process_documents(files_to_process):
     """
     try:
         with st.spinner("Processing documents..."):
-            all_documents = []
+            # Models may still be loading in the background
+            _collect_components(wait=True)
             
             # Check file sizes (2GB = 2 * 1024 * 1024 * 1024 bytes)
             max_size = 2 * 1024 * 1024 * 1024  # 2GB in bytes
             
-            for file in files_to_process:
-                # Handle both file objects and file paths
-                if isinstance(file, str):  # File path
-                    file_size = os.path.getsize(file)
-                    file_name = os.path.basename(file)
-                    
-                    if file_size > max_size:
-                        st.error(f"File '{file_name}' is too large ({file_size / (1024**3):.2f} GB). Maximum allowed size is 2GB.")
-                        return False
-                    
-                    # Open file and process
-                    with open(file, 'rb') as f:
-                        documents = st.session_state.processor.process_document(f)
-                        all_documents.extend(documents)
-                else:  # File object (from uploader)
-                    # Check file size
-                    file.seek(0, 2)  # Seek to end
-                    file_size = file.tell()  # Get file size
-                    file.seek(0)  # Reset to beginning
-                    
-                    if file_size > max_size:
-                        st.error(f"File '{file.name}' is too large ({file_size / (1024**3):.2f} GB). Maximum allowed size is 2GB.")
-                        return False
-                    
-                    # Process each document using LangChain pipeline
-                    documents = st.session_state.processor.process_document(file)
-                    all_documents.extend(documents)
+            # Skip duplicate files within this batch
+            with ThreadPoolExecutor(max_workers=min(8, len(files_to_process))) as executor:
+                file_hashes = list(executor.map(_file_hash, files_to_process))
                 
-            # Store processed documents in session state
-            st.session_state.documents = all_documents
+            unique_files = []
+            unique_hashes = []
+            for file, file_hash in zip(files_to_process, file_hashes):
+                if file_hash in unique_hashes:
+                    st.info(f"Skipping duplicate: {_file_name(file)}")
+                    continue
+                unique_files.append(file)
+                unique_hashes.append(file_hash)
+            files_to_process = unique_files
             
-            # Create embeddings for the documents
-            success = st.session_state.embedding_manager.create_embeddings(all_documents)
+            # The index always reflects exactly the current set of files;
+            # nothing to do if that set is already indexed
+            if set(unique_hashes) == st.session_state.processed_hashes and st.session_state.doc_count:
+                st.info("These documents have already been processed.")
+                return True
+                
+            # Reuse a persisted index if this exact set of files was processed before
+            cache_key = _index_cache_key(unique_hashes)
+            
+            cached_documents = st.session_state.embedding_manager.load_embeddings(cache_key)
+            if cached_documents:
+                _connect_retriever()
+                st.session_state.doc_count = len(cached_documents)
+                st.session_state.processed_hashes = set(unique_hashes)
+                st.success(f"Loaded {len(cached_documents)} document chunks from cache!")
+                return True
+            
+            # Reject oversize files before any work starts
+            errors = [error for error in (_size_error(file, max_size) for file in files_to_process) if error]
+            if errors:
+                for error in errors:
+                    st.error(error)
+                return False
+                
+            # Parse files concurrently; PDF parsing is mostly I/O and C-library bound.
+            # Workers must not touch Streamlit, so per-file problems are reported
+            # afterwards and the remaining files are still indexed.
+            processor = st.session_state.processor
+            warnings = []
+            indexed_hashes = []
+            chunk_count = 0
+            
+            def parsed_documents():
+                nonlocal chunk_count
+                with ThreadPoolExecutor(max_workers=min(8, len(files_to_process))) as executor:
+                    futures = {
+                        executor.submit(_spool_and_process, processor, file, file_hash, max_size): (file, file_hash)
+                        for file, file_hash in zip(files_to_process, unique_hashes)
+                    }
+                    for future in as_completed(futures):
+                        file, file_hash = futures[future]
+                        try:
+                            documents, error = future.result()
+                        except Exception as e:
+                            documents, error = [], f"Error processing '{_file_name(file)}': {str(e)}"
+                            
+                        if error:
+                            warnings.append(error)
+                            continue
+                        if not documents:
+                            warnings.append(f"No text could be extracted from '{_file_name(file)}'.")
+                            continue
+                            
+                        indexed_hashes.append(file_hash)
+                        chunk_count += len(documents)
+                        yield from documents
+                        
+            # Embed each file's chunks as soon as it is parsed; the current index
+            # is only replaced once a new one has been built
+            success = st.session_state.embedding_manager.create_embeddings_streaming(
+                parsed_documents(),
+                batch_size=Config.EMBEDDING_BATCH_SIZE
+            )
             
+            for warning in warnings:
+                st.warning(warning)
+                
             if success:
-                # Connect the retriever to the chat manager
-                st.session_state.chat_manager.set_retriever(
-                    st.session_state.embedding_manager.retriever
-                )
-                st.success(f"Successfully processed {len(all_documents)} document chunks!")
+                # Persist under the files that were actually indexed
+                st.session_state.embedding_manager.save_embeddings(_index_cache_key(indexed_hashes))
+                _connect_retriever()
+                
+                # The chunk text lives in the vector store; keep only the count
+                st.session_state.doc_count = chunk_count
+                st.session_state.processed_hashes = set(indexed_hashes)
+                st.success(f"Successfully processed {chunk_count} document chunks!")
                 return True
+            elif not chunk_count:
+                st.error("No document chunks could be extracted from the selected files.")
+                return False
             else:
                 st.error("Failed to create embeddings.")
                 return False
@@ -138,6 +469,9 @@ def main():
             help="Enter the full path to your PDF file"
         )
         
+        # Only the path currently entered is processed; a corrected or
+        # cleared input must not leave earlier paths behind
+        st.session_state.large_files = set()
         if file_path:
             if not file_path.lower().endswith('.pdf'):
                 st.error("Please enter a valid PDF file path")
@@ -151,10 +485,7 @@ def main():
                         st.error(f"File is too large ({file_size / (1024**3):.2f} GB). Maximum allowed size is 2GB.")
                     else:
                         st.success(f"File found: {os.path.basename(file_path)} ({file_size / (1024**2):.1f} MB)")
-                        # Add to uploaded_files list
-                        if 'large_files' not in st.session_state:
-                            st.session_state.large_files = []
-                        st.session_state.large_files.append(file_path)
+                        st.session_state.large_files = {file_path}
                 except Exception as e:
                     st.error(f"Error reading file: {str(e)}")
         
@@ -162,64 +493,91 @@ def main():
         all_files_to_process = []
         if uploaded_files:
             all_files_to_process.extend(uploaded_files)
-        if 'large_files' in st.session_state and st.session_state.large_files:
-            all_files_to_process.extend(st.session_state.large_files)
+        if st.session_state.large_files:
+            all_files_to_process.extend(sorted(st.session_state.large_files))
             
         if all_files_to_process:
             process_button = st.button("Process Documents")
             if process_button:
                 process_documents(all_files_to_process)
                 
-        if st.session_state.documents:
-            st.success(f"{len(st.session_state.documents)} chunks in memory")
+        if st.session_state.doc_count:
+            st.success(f"{st.session_state.doc_count} chunks in memory")
             
             # Add a button to clear the conversation history
             if st.button("Clear Conversation"):
                 st.session_state.messages = []
+                st.session_state.history_archive = []
                 st.session_state.chat_manager.reset_conversation()
                 st.rerun()
             # Add a button to clear file chunks
             if st.button("Clear File Chunks"):
-                st.session_state.documents = []
-                if 'large_files' in st.session_state:
-                    st.session_state.large_files = []
-                if hasattr(st.session_state.embedding_manager, 'clear_embeddings'):
-                    st.session_state.embedding_manager.clear_embeddings()
+                st.session_state.doc_count = 0
+                st.session_state.processed_hashes = set()
+                st.session_state.pop("generate", None)
+                st.session_state.semantic_cache.clear()
+                st.session_state.large_files = set()
+                st.session_state.embedding_manager.clear_embeddings()
                 st.rerun()
     
-    # Display chat history
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.write(message["content"])
+    # Display chat history, keeping only recent turns. Each message gets its own
+    # chat_message so one reply's markdown cannot break the others, and the
+    # history looks the same as the turn that was just streamed.
+    _trim_history()
+    with st.container():
+        for message in st.session_state.messages:
+            with st.chat_message(message["role"]):
+                st.write(message["content"])
 
+    if not st.session_state.ready:
+        _wait_for_components()
+        
     # Chat input
-    if query := st.chat_input("Ask your question"):
+    if query := st.chat_input("Ask your question", disabled=not st.session_state.ready):
         # Add user message to chat
         st.session_state.messages.append({"role": "user", "content": query})
         with st.chat_message("user"):
             st.write(query)
 
         # Check if documents have been uploaded and processed
-        if not st.session_state.documents:
-            with st.chat_message("assistant"):
-                st.write("Please upload and process PDF documents first!")
-            st.session_state.messages.append({"role": "assistant", "content": "Please upload and process PDF documents first!"})
+        if not st.session_state.doc_count:
+            reply = "Please upload and process PDF documents first!"
+            st.chat_message("assistant").write(reply)
+            st.session_state.messages.append({"role": "assistant", "content": reply})
             return
 
         # Generate and display assistant response
         with st.chat_message("assistant"):
+            # Conversational turns skip the cache, retrieval and the RAG chain
+            if not needs_retrieval(query):
+                with st.spinner("Thinking..."):
+                    response = st.session_state.chat_manager.chat_only(query)
+                    
+                    st.write(response)
+                    st.session_state.messages.append({"role": "assistant", "content": response})
+                return
+            
+            # Follow-ups are condensed into a standalone question first, so the
+            # semantic cache can match repeated or paraphrased questions on any turn
+            # without matching a follow-up to an unrelated earlier question
             with st.spinner("Thinking..."):
-                # If using direct retriever-based approach
-                if hasattr(st.session_state.embedding_manager, 'retriever') and st.session_state.embedding_manager.retriever:
-                    # Using LangChain's conversational retrieval chain
-                    response = st.session_state.chat_manager.generate_response(query, [])
-                else:
-                    # Fallback to manual retrieval and response generation
-                    relevant_docs = st.session_state.embedding_manager.search(query)
-                    response = st.session_state.chat_manager.generate_response(query, relevant_docs)
-                
-                st.write(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
+                question = st.session_state.chat_manager.condense_question(query)
+                if question is not None:
+                    question_embedding = st.session_state.embedding_manager.embed_query(question)
+                    cached = st.session_state.semantic_cache.get(question_embedding)
+                    if cached:
+                        st.write(cached["response"])
+                        st.session_state.chat_manager.save_exchange(query, cached["response"])
+                        st.session_state.messages.append({"role": "assistant", "content": cached["response"]})
+                        return
+                        
+                # Retrieval is handled by the chain wired up at ingestion time and
+                # runs before the first token; the answer is shown as it streams
+                stream = st.session_state.generate(query, [], question=question)
+            response = st.write_stream(stream)
+            st.session_state.messages.append({"role": "assistant", "content": response})
+            if question is not None and st.session_state.chat_manager.answer_complete:
+                st.session_state.semantic_cache.put(question_embedding, question, response)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
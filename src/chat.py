@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 import time
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.chains import ConversationalRetrievalChain
@@ -6,9 +6,12 @@ from langchain.memory import ConversationBufferMemory
 from langchain.schema import Document
 from langchain.prompts import PromptTemplate
 from langchain.chains.llm import LLMChain
-from langchain.schema.messages import SystemMessage, HumanMessage, AIMessage
+from langchain.schema.messages import SystemMessage, HumanMessage, AIMessage, get_buffer_string
 from src.config import Config
 
+# Returned when the LLM cannot produce an answer; never worth caching
+ERROR_RESPONSE = "I encountered an error while processing your request. Please try again later."
+
 class ChatManager:
     """
     Manages chat interactions using LangChain components.
@@ -24,7 +27,9 @@ class ChatManager:
         self.api_key = api_key
         self.memory = None
         self.chain = None
+        self.qa_prompt = None
         self.llm = None
+        self.answer_complete = False
         self._initialize_components()
         
     def _initialize_components(self):
@@ -78,7 +83,7 @@ class ChatManager:
         """
         
         # Create prompt templates
-        qa_prompt = PromptTemplate(
+        self.qa_prompt = PromptTemplate(
             input_variables=["context", "question"],
             template=system_template + "\nQuestion: {question}"
         )
@@ -89,7 +94,7 @@ class ChatManager:
             retriever=retriever,
             memory=self.memory,
             return_source_documents=True,
-            combine_docs_chain_kwargs={"prompt": qa_prompt},
+            combine_docs_chain_kwargs={"prompt": self.qa_prompt},
             verbose=False
         )
         
@@ -134,7 +139,7 @@ class ChatManager:
                     except Exception as retry_e:
                         print(f"Retry {attempt+1} failed: {str(retry_e)}")
                 
-                return "I encountered an error while processing your request. Please try again later."
+                return ERROR_RESPONSE
         else:
             # Use the chain if available
             try:
@@ -145,6 +150,136 @@ class ChatManager:
                 # Fall back to direct LLM call
                 return self.generate_response(query, context_docs)
                 
+    def condense_question(self, query: str) -> Optional[str]:
+        """
+        Rewrite a follow-up into a standalone question using the conversation history,
+        the same way the conversational retrieval chain does.
+        
+        Args:
+            query: The user's question
+            
+        Returns:
+            Optional[str]: The standalone question, or None if condensing failed
+        """
+        history = self.get_conversation_history()
+        if not self.chain or not history:
+            return query
+            
+        try:
+            return self.chain.question_generator.predict(
+                question=query,
+                chat_history=get_buffer_string(history)
+            )
+        except Exception as e:
+            print(f"Error condensing question: {str(e)}")
+            return None
+            
+    def generate_response_stream(self, query: str, context_docs: List[Document], question: Optional[str] = None) -> Iterator[str]:
+        """
+        Generate a response like generate_response, streaming text chunks as the LLM produces them.
+        Mirrors the conversational retrieval chain: the question is condensed using the
+        conversation history and context is retrieved before this method returns,
+        so callers can show progress for that phase. The returned iterator streams the answer.
+        
+        Args:
+            query: The user's question
+            context_docs: List of context documents, used when no retriever is set
+            question: The standalone question from condense_question, if already computed
+            
+        Returns:
+            Iterator[str]: Chunks of the generated response
+        """
+        self.answer_complete = False
+        try:
+            question = question or self.condense_question(query)
+            if question is None:
+                return iter([ERROR_RESPONSE])
+                
+            if self.chain:
+                context_docs = self.chain.retriever.invoke(question)
+                
+            context_text = "\n\n".join(doc.page_content for doc in context_docs)
+            if self.qa_prompt:
+                messages = [HumanMessage(content=self.qa_prompt.format(context=context_text, question=question))]
+            else:
+                messages = [
+                    SystemMessage(content=f"You are a helpful assistant that answers questions based on the provided context. If you cannot find the answer in the context, say so.\n\nContext:\n{context_text}"),
+                    HumanMessage(content=query)
+                ]
+        except Exception as e:
+            print(f"Error retrieving context: {str(e)}")
+            return iter([ERROR_RESPONSE])
+            
+        return self._stream_answer(query, messages)
+        
+    def _stream_answer(self, query: str, messages) -> Iterator[str]:
+        """
+        Stream the LLM's answer and record the exchange once it is complete.
+        Failed, cut-off, and empty answers are not recorded, and answer_complete
+        stays False so callers can skip caching them.
+        
+        Args:
+            query: The user's question
+            messages: The prompt messages to send to the LLM
+            
+        Yields:
+            str: Chunks of the generated response
+        """
+        answer = ""
+        try:
+            for chunk in self.llm.stream(messages):
+                if chunk.content:
+                    answer += chunk.content
+                    yield chunk.content
+        except Exception as e:
+            print(f"Error streaming response: {str(e)}")
+            yield f"\n\n{ERROR_RESPONSE}" if answer else ERROR_RESPONSE
+            return
+            
+        if not answer:
+            yield ERROR_RESPONSE
+            return
+            
+        self.save_exchange(query, answer)
+        self.answer_complete = True
+
+    def chat_only(self, query: str) -> str:
+        """
+        Respond to a conversational message without retrieving any documents.
+        The exchange is still recorded in the conversation memory.
+        
+        Args:
+            query: The user's message
+            
+        Returns:
+            str: The generated response
+        """
+        messages = [
+            SystemMessage(content="You are a helpful assistant that answers questions about the user's documents. Reply briefly and naturally to conversational messages."),
+            *self.get_conversation_history(),
+            HumanMessage(content=query)
+        ]
+        
+        try:
+            response = self.llm(messages)
+            answer = response.content
+        except Exception as e:
+            print(f"Error generating response: {str(e)}")
+            return ERROR_RESPONSE
+            
+        self.save_exchange(query, answer)
+        return answer
+                
+    def save_exchange(self, query: str, answer: str):
+        """
+        Record a question and its answer in the conversation memory.
+        
+        Args:
+            query: The user's question
+            answer: The answer shown to the user
+        """
+        self.memory.save_context({"question": query}, {"answer": answer})
+        
     def set_retriever(self, retriever):
         """
         Set the retriever and create a conversation chain.
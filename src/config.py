@@ -16,20 +16,43 @@ class Config:
     # Text chunking parameters
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+    CHUNK_CACHE_DIR = os.getenv("CHUNK_CACHE_DIR", ".cache/chunks")
+    CHUNK_CACHE_MAX_ENTRIES = int(os.getenv("CHUNK_CACHE_MAX_ENTRIES", "256"))
+    
+    # File I/O settings
+    IO_CHUNK_SIZE = int(os.getenv("IO_CHUNK_SIZE", str(4 * 1024 * 1024)))
     
     # Model settings
     MODEL_NAME = os.getenv("MODEL_NAME", "gemini-2.0-flash")
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "128"))
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "512"))
     
     # Retrieval settings
     TOP_K = int(os.getenv("TOP_K", "4"))
     
+    # Vector index settings (HNSW below IVF_THRESHOLD vectors, IVF-PQ above)
+    HNSW_M = int(os.getenv("HNSW_M", "32"))
+    HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+    HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+    VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "fp16")  # fp16, sq8 or none
+    IVF_THRESHOLD = int(os.getenv("IVF_THRESHOLD", "1000000"))
+    IVF_INDEX_FACTORY = os.getenv("IVF_INDEX_FACTORY", "IVF4096,PQ64")
+    IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+    INDEX_CACHE_DIR = os.getenv("INDEX_CACHE_DIR", ".cache/index")
+    INDEX_CACHE_MAX_ENTRIES = int(os.getenv("INDEX_CACHE_MAX_ENTRIES", "8"))
+    
+    # Semantic response cache settings
+    SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1024"))
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    
     # LLM parameters
     LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", "2048"))
     
     # Memory settings
     MAX_HISTORY_TOKENS = int(os.getenv("MAX_HISTORY_TOKENS", "2000"))
+    MAX_CHAT_MESSAGES = int(os.getenv("MAX_CHAT_MESSAGES", "50"))
     
     @classmethod
     def get_llm_params(cls) -> Dict[str, Any]:
@@ -1,70 +1,380 @@
-from typing import List, Dict, Any
+import os
+import json
+import uuid
+import functools
+import itertools
+from typing import List, Dict, Any, Iterable
 import numpy as np
+import faiss
+import pyarrow as pa
+import pyarrow.parquet as pq
 from langchain_community.embeddings import SentenceTransformerEmbeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
 from src.config import Config
 
+# Scalar quantizers for HNSW vector storage, selected by Config.VECTOR_QUANTIZATION
+QUANTIZER_TYPES = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Wraps an embedding model and memoizes query embeddings on the exact query text.
+    Used as the vector store's embedding function so retrieval shares the cache.
+    """
+    def __init__(self, embedding_model: Embeddings):
+        """
+        Initialize the wrapper.
+        
+        Args:
+            embedding_model: The embedding model to delegate to
+        """
+        self.embedding_model = embedding_model
+        self._embed_query_cached = functools.lru_cache(maxsize=Config.QUERY_CACHE_SIZE)(
+            lambda text: tuple(self.embedding_model.embed_query(text))
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds documents without caching.
+        
+        Args:
+            texts: The texts to embed
+            
+        Returns:
+            List[List[float]]: One embedding per text
+        """
+        return self.embedding_model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embeds a query, reusing the result for identical query text.
+        
+        Args:
+            text: The query text
+            
+        Returns:
+            List[float]: The query embedding
+        """
+        return list(self._embed_query_cached(text))
+
+    def clear_cache(self):
+        """
+        Discards all memoized query embeddings.
+        """
+        self._embed_query_cached.cache_clear()
+
 class EmbeddingManager:
     """
     Manages embeddings and retrieval using LangChain components.
     Uses SentenceTransformerEmbeddings for embeddings and FAISS for vector storage.
     """
-    def __init__(self):
-        # Initialize the embedding model using LangChain's HuggingFaceEmbeddings
-        self.embedding_model = HuggingFaceEmbeddings(
-            model_name=Config.EMBEDDING_MODEL
-        )
+    def __init__(self, embedding_model=None):
+        """
+        Initialize the EmbeddingManager.
+        
+        Args:
+            embedding_model: A shared embedding model; a new one is loaded if not given
+        """
+        self.embedding_model = embedding_model or self.load_embedding_model()
+        self.query_embeddings = CachedQueryEmbeddings(self.embedding_model)
         self.vectorstore = None
         self.retriever = None
 
-    def create_embeddings(self, documents: List[Document]):
+    @staticmethod
+    def load_embedding_model() -> HuggingFaceEmbeddings:
+        """
+        Loads the embedding model using LangChain's HuggingFaceEmbeddings.
+        Embeddings are L2-normalized so inner product equals cosine similarity.
+        
+        Returns:
+            HuggingFaceEmbeddings: The embedding model
+        """
+        return HuggingFaceEmbeddings(
+            model_name=Config.EMBEDDING_MODEL,
+            encode_kwargs={
+                "normalize_embeddings": True,
+                "batch_size": Config.EMBEDDING_BATCH_SIZE,
+                "convert_to_numpy": True
+            }
+        )
+
+    def _build_index(self, vectors: np.ndarray):
+        """
+        Builds an approximate nearest-neighbour FAISS index for the given vectors.
+        Uses HNSW for small and medium corpora and IVF-PQ for very large ones.
+        HNSW vectors are stored scalar-quantized unless VECTOR_QUANTIZATION is "none".
+        
+        Args:
+            vectors: Contiguous float32 array of shape (N, d), L2-normalized
+            
+        Returns:
+            The populated FAISS index
+        """
+        num_vectors, dim = vectors.shape
+        
+        if num_vectors >= Config.IVF_THRESHOLD:
+            index = faiss.index_factory(dim, Config.IVF_INDEX_FACTORY, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+            index.add(vectors)
+            faiss.extract_index_ivf(index).nprobe = Config.IVF_NPROBE
+        else:
+            quantizer_type = QUANTIZER_TYPES.get(Config.VECTOR_QUANTIZATION)
+            if quantizer_type is None:
+                index = faiss.IndexHNSWFlat(dim, Config.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            else:
+                index = faiss.IndexHNSWSQ(dim, quantizer_type, Config.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+                index.train(vectors)
+            index.hnsw.efConstruction = Config.HNSW_EF_CONSTRUCTION
+            index.hnsw.efSearch = Config.HNSW_EF_SEARCH
+            index.add(vectors)
+            
+        return index
+
+    def _embed_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Embeds texts in fixed-size batches into a single preallocated array.
+        
+        Args:
+            texts: The texts to embed
+            
+        Returns:
+            np.ndarray: Contiguous float32 array of shape (len(texts), d)
+        """
+        batch_size = Config.EMBEDDING_BATCH_SIZE
+        vectors = None
+        
+        for start in range(0, len(texts), batch_size):
+            batch = self.embedding_model.embed_documents(texts[start:start + batch_size])
+            if vectors is None:
+                vectors = np.empty((len(texts), len(batch[0])), dtype=np.float32)
+            vectors[start:start + len(batch)] = batch
+            
+        return vectors
+
+    def _set_vectorstore(self, index, documents: List[Document]):
         """
-        Creates embeddings for documents and stores them in FAISS.
+        Wraps a FAISS index in LangChain's FAISS vector store and creates the retriever.
         
         Args:
-            documents: List of LangChain Document objects
+            index: The populated FAISS index
+            documents: The documents, in the same order as the index vectors
         """
+        index_to_docstore_id = {i: str(i) for i in range(len(documents))}
+        docstore = InMemoryDocstore(
+            {index_to_docstore_id[i]: doc for i, doc in enumerate(documents)}
+        )
+        self.vectorstore = FAISS(
+            embedding_function=self.query_embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id,
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+        )
+        
+        # Create a retriever from the vector store
+        self.retriever = self.vectorstore.as_retriever(
+            search_type="similarity",
+            search_kwargs={"k": Config.TOP_K}
+        )
+
+    @staticmethod
+    def _cache_paths(cache_key: str):
+        """
+        Gets the on-disk locations of a persisted index and its chunks.
+        
+        Args:
+            cache_key: Hash identifying the input files and index settings
+            
+        Returns:
+            tuple: The index path and the chunk metadata path
+        """
+        return (
+            os.path.join(Config.INDEX_CACHE_DIR, f"index_{cache_key}.faiss"),
+            os.path.join(Config.INDEX_CACHE_DIR, f"docs_{cache_key}.parquet"),
+        )
+
+    def _save(self, cache_key: str, index, documents: List[Document]):
+        """
+        Persists the index and chunk metadata to disk.
+        
+        Args:
+            cache_key: Hash identifying the input files and index settings
+            index: The populated FAISS index
+            documents: The documents, in the same order as the index vectors
+        """
+        index_path, docs_path = self._cache_paths(cache_key)
+        suffix = f".{uuid.uuid4().hex}.tmp"
+        index_temp, docs_temp = index_path + suffix, docs_path + suffix
         try:
-            # Create FAISS index from documents using LangChain
-            self.vectorstore = FAISS.from_documents(
-                documents, 
-                self.embedding_model
-            )
-            
-            # Create a retriever from the vector store
-            self.retriever = self.vectorstore.as_retriever(
-                search_type="similarity",
-                search_kwargs={"k": Config.TOP_K}
-            )
-            
-            return True
+            os.makedirs(Config.INDEX_CACHE_DIR, exist_ok=True)
+            
+            faiss.write_index(index, index_temp)
+            table = pa.table({
+                "page_content": [doc.page_content for doc in documents],
+                "metadata": [json.dumps(doc.metadata) for doc in documents],
+            })
+            pq.write_table(table, docs_temp)
+            
+            # Move complete files into place; the chunks go last because
+            # load_embeddings only uses an entry once both files exist
+            os.replace(index_temp, index_path)
+            os.replace(docs_temp, docs_path)
+            self._prune_cache()
         except Exception as e:
-            print(f"Error creating embeddings: {str(e)}")
-            return False
+            print(f"Error saving embeddings: {str(e)}")
+            for temp_path in (index_temp, docs_temp):
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+    @staticmethod
+    def _prune_cache():
+        """
+        Deletes the least recently used persisted indexes beyond Config.INDEX_CACHE_MAX_ENTRIES.
+        """
+        index_files = [
+            os.path.join(Config.INDEX_CACHE_DIR, name)
+            for name in os.listdir(Config.INDEX_CACHE_DIR)
+            if name.startswith("index_") and name.endswith(".faiss")
+        ]
+        index_files.sort(key=os.path.getmtime, reverse=True)
+        
+        for index_path in index_files[Config.INDEX_CACHE_MAX_ENTRIES:]:
+            cache_key = os.path.basename(index_path)[len("index_"):-len(".faiss")]
+            for path in EmbeddingManager._cache_paths(cache_key):
+                if os.path.exists(path):
+                    os.remove(path)
 
-    def search(self, query: str, k: int = None) -> List[Document]:
+    def load_embeddings(self, cache_key: str) -> List[Document]:
         """
-        Searches for relevant documents based on the query.
+        Loads a previously persisted index. With faiss builds that provide
+        IO_FLAG_MMAP_IFC, the whole index file (including HNSW and flat vector
+        storage) is memory-mapped and paged in on demand; older builds can only
+        map IVF inverted lists, so other index types are read into RAM.
         
         Args:
-            query: The search query
-            k: Number of documents to retrieve (defaults to Config.TOP_K)
+            cache_key: Hash identifying the input files and index settings
             
         Returns:
-            List[Document]: A list of relevant Document objects
+            List[Document]: The indexed documents, or an empty list if nothing was cached
         """
-        if not k:
-            k = Config.TOP_K
+        index_path, docs_path = self._cache_paths(cache_key)
+        if not (os.path.exists(index_path) and os.path.exists(docs_path)):
+            return []
             
-        if not self.vectorstore:
+        try:
+            mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+            try:
+                index = faiss.read_index(index_path, mmap_flag | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError:
+                # Not every index type can be memory-mapped
+                index = faiss.read_index(index_path)
+                        
+            columns = pq.read_table(docs_path).to_pydict()
+            documents = [
+                Document(page_content=content, metadata=json.loads(metadata))
+                for content, metadata in zip(columns["page_content"], columns["metadata"])
+            ]
+            
+            self._set_vectorstore(index, documents)
+            
+            # Mark the entry as recently used so pruning keeps it
+            os.utime(index_path)
+            os.utime(docs_path)
+            return documents
+        except Exception as e:
+            print(f"Error loading embeddings: {str(e)}")
             return []
+
+    def create_embeddings_streaming(self, documents: Iterable[Document], batch_size: int = None):
+        """
+        Embeds documents batch by batch as an iterator produces them, so embedding
+        overlaps with parsing, and replaces the vector store with a new FAISS index.
+        Vectors are buffered until Config.IVF_THRESHOLD is reached or the iterator ends,
+        so the index type is chosen and any quantizer trained on a representative sample;
+        later batches are added to the built index.
+        The current vector store is only replaced once the iterator has been
+        consumed without errors.
+        
+        Args:
+            documents: Iterable of LangChain Document objects
+            batch_size: Number of documents per embedding batch (defaults to Config.EMBEDDING_BATCH_SIZE)
             
+        Returns:
+            bool: True if the new index was built, False otherwise
+        """
+        batch_size = batch_size or Config.EMBEDDING_BATCH_SIZE
+        documents = iter(documents)
+        indexed_documents = []
+        buffered_vectors = []
+        buffered_count = 0
+        index = None
+        
         try:
-            # Use the retriever to get relevant documents
-            relevant_docs = self.retriever.get_relevant_documents(query)
-            return relevant_docs
+            while batch := list(itertools.islice(documents, batch_size)):
+                vectors = self._embed_texts([doc.page_content for doc in batch])
+                faiss.normalize_L2(vectors)
+                indexed_documents.extend(batch)
+                
+                if index is not None:
+                    index.add(vectors)
+                    continue
+                    
+                buffered_vectors.append(vectors)
+                buffered_count += len(vectors)
+                if buffered_count >= Config.IVF_THRESHOLD:
+                    index = self._build_index(np.concatenate(buffered_vectors))
+                    buffered_vectors = []
+                    
+            if index is None:
+                if not buffered_vectors:
+                    return False
+                index = self._build_index(np.concatenate(buffered_vectors))
         except Exception as e:
-            print(f"Error during search: {str(e)}")
-            return []
\ No newline at end of file
+            print(f"Error creating embeddings: {str(e)}")
+            return False
+            
+        self._set_vectorstore(index, indexed_documents)
+        return True
+
+    def save_embeddings(self, cache_key: str):
+        """
+        Persists the current vector store to disk so load_embeddings can reuse it.
+        
+        Args:
+            cache_key: Hash identifying the input files and index settings
+        """
+        if self.vectorstore is None:
+            return
+            
+        documents = [
+            self.vectorstore.docstore.search(self.vectorstore.index_to_docstore_id[i])
+            for i in range(len(self.vectorstore.index_to_docstore_id))
+        ]
+        self._save(cache_key, self.vectorstore.index, documents)
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embeds a single query string.
+        
+        Args:
+            query: The query text
+            
+        Returns:
+            np.ndarray: The query embedding as a float32 vector
+        """
+        return np.asarray(self.query_embeddings.embed_query(query), dtype=np.float32)
+
+    def clear_embeddings(self):
+        """
+        Drops the vector store, the retriever and the cached query embeddings.
+        """
+        self.vectorstore = None
+        self.retriever = None
+        self.query_embeddings.clear_cache()
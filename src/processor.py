@@ -1,11 +1,115 @@
 import io
-from typing import List, Dict, Any
+import os
+import hashlib
+import tempfile
+import functools
+from typing import List, Dict, Any, Optional
+import pyarrow as pa
+import pyarrow.parquet as pq
 from langchain_community.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.docstore.document import Document
 from src.config import Config
 import PyPDF2
 
+def _chunk_cache_path(content_hash: str) -> str:
+    """
+    Get the chunk cache location for a file's contents under the current chunker settings.
+    
+    Args:
+        content_hash: BLAKE2b digest of the file contents
+        
+    Returns:
+        str: The path of the Parquet cache entry
+    """
+    key = f"{content_hash}_{Config.CHUNK_SIZE}_{Config.CHUNK_OVERLAP}"
+    return os.path.join(Config.CHUNK_CACHE_DIR, f"{key}.parquet")
+
+def _read_cached_chunks(content_hash: str) -> Optional[List[str]]:
+    """
+    Read a file's text chunks from the chunk cache.
+    
+    Args:
+        content_hash: BLAKE2b digest of the file contents
+        
+    Returns:
+        Optional[List[str]]: The cached chunks, or None if the file is not cached
+    """
+    cache_path = _chunk_cache_path(content_hash)
+    if not os.path.exists(cache_path):
+        return None
+        
+    try:
+        chunks = pq.read_table(cache_path).to_pydict()["page_content"]
+        
+        # Mark the entry as recently used so pruning keeps it
+        os.utime(cache_path)
+        return chunks
+    except Exception as e:
+        # Unreadable cache entry; the caller parses the file again
+        print(f"Error reading cached chunks: {str(e)}")
+        return None
+
+def _prune_chunk_cache():
+    """
+    Delete the least recently used chunk cache entries beyond Config.CHUNK_CACHE_MAX_ENTRIES.
+    """
+    cache_files = [
+        os.path.join(Config.CHUNK_CACHE_DIR, name)
+        for name in os.listdir(Config.CHUNK_CACHE_DIR)
+        if name.endswith(".parquet")
+    ]
+    cache_files.sort(key=os.path.getmtime, reverse=True)
+    
+    for cache_path in cache_files[Config.CHUNK_CACHE_MAX_ENTRIES:]:
+        os.remove(cache_path)
+
+def cache_chunks(split):
+    """
+    Decorator that caches a PDF's text chunks on disk as Parquet.
+    Keyed by the BLAKE2b digest of the file contents and the chunker settings,
+    so unchanged files are not parsed again.
+    
+    Args:
+        split: Method taking a PDF file object and returning its text chunks
+        
+    Returns:
+        The wrapped method, which also accepts a precomputed content_hash
+    """
+    @functools.wraps(split)
+    def wrapper(self, pdf_file, content_hash: str = None) -> List[str]:
+        if content_hash is None:
+            digest = hashlib.blake2b()
+            pdf_file.seek(0)
+            while block := pdf_file.read(Config.IO_CHUNK_SIZE):
+                digest.update(block)
+            pdf_file.seek(0)
+            content_hash = digest.hexdigest()
+        
+        chunks = _read_cached_chunks(content_hash)
+        if chunks is not None:
+            return chunks
+            
+        chunks = split(self, pdf_file)
+        
+        # Write to a temporary file and move it into place so concurrent
+        # readers never see a partially written cache entry
+        temp_path = None
+        try:
+            os.makedirs(Config.CHUNK_CACHE_DIR, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=Config.CHUNK_CACHE_DIR, suffix=".tmp")
+            os.close(fd)
+            pq.write_table(pa.table({"page_content": chunks}), temp_path)
+            os.replace(temp_path, _chunk_cache_path(content_hash))
+            _prune_chunk_cache()
+        except Exception as e:
+            print(f"Error caching chunks: {str(e)}")
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            
+        return chunks
+    return wrapper
+
 class PDFProcessor:
     """
     Processes PDF documents using LangChain components for document loading and text splitting.
@@ -47,32 +151,74 @@ class PDFProcessor:
         """
         return self.text_splitter.split_text(text)
         
-    def process_document(self, pdf_file) -> List[Document]:
+    @cache_chunks
+    def split_document(self, pdf_file) -> List[str]:
+        """
+        Extracts text from a PDF file and splits it into chunks.
+        Results are cached on disk by file contents and chunker settings.
+        
+        Args:
+            pdf_file: A seekable file-like object
+            content_hash: Precomputed BLAKE2b digest of the file (computed if not given)
+            
+        Returns:
+            List[str]: A list of text chunks
+        """
+        return self.split_text(self.extract_text(pdf_file))
+        
+    def process_document(self, pdf_file, source: str = None, content_hash: str = None) -> List[Document]:
         """
         Full document processing pipeline: extract text and split into chunks.
         
         Args:
             pdf_file: A file-like object (from Streamlit's file_uploader)
+            source: Name recorded in chunk metadata (defaults to pdf_file.name)
+            content_hash: Precomputed BLAKE2b digest of the file, used as the chunk cache key
             
         Returns:
             List[Document]: A list of LangChain Document objects with text chunks
         """
+        source = source or pdf_file.name
         try:
-            text = self.extract_text(pdf_file)
-            chunks = self.split_text(text)
+            chunks = self.split_document(pdf_file, content_hash=content_hash)
+            return self._to_documents(chunks, source)
+        except Exception as e:
+            print(f"Error processing document {source}: {str(e)}")
+            return []
+            
+    def load_cached_document(self, content_hash: str, source: str) -> Optional[List[Document]]:
+        """
+        Get a document's chunks from the chunk cache without reading the file.
+        
+        Args:
+            content_hash: BLAKE2b digest of the file contents
+            source: Name recorded in chunk metadata
             
-            # Convert to LangChain Document objects with metadata
-            documents = [
-                Document(
-                    page_content=chunk,
-                    metadata={
-                        "source": pdf_file.name,
-                        "chunk_id": i
-                    }
-                ) for i, chunk in enumerate(chunks)
-            ]
+        Returns:
+            Optional[List[Document]]: The cached chunks as LangChain Documents, or None if not cached
+        """
+        chunks = _read_cached_chunks(content_hash)
+        if chunks is None:
+            return None
+        return self._to_documents(chunks, source)
+        
+    def _to_documents(self, chunks: List[str], source: str) -> List[Document]:
+        """
+        Convert text chunks to LangChain Document objects with metadata.
+        
+        Args:
+            chunks: The text chunks
+            source: Name recorded in chunk metadata
             
-            return documents
-        except Exception as e:
-            print(f"Error processing document {pdf_file.name}: {str(e)}")
-            return []
\ No newline at end of file
+        Returns:
+            List[Document]: A list of LangChain Document objects
+        """
+        return [
+            Document(
+                page_content=chunk,
+                metadata={
+                    "source": source,
+                    "chunk_id": i
+                }
+            ) for i, chunk in enumerate(chunks)
+        ]
\ No newline at end of file
@@ -0,0 +1,29 @@
+import re
+
+# Messages made up only of greetings, acknowledgements or similar filler
+CONVERSATIONAL_PATTERN = re.compile(
+    r"^(hi|hello|hey|thanks|thank you|thx|ok|okay|cool|great|nice|bye|goodbye|"
+    r"can you repeat|please repeat|repeat)"
+    r"(\s+(so much|a lot|again|there|that|it|please|you|all))*[\s!.?,]*$",
+    re.IGNORECASE
+)
+
+# Anything longer than this is treated as a real question without matching
+MAX_CONVERSATIONAL_WORDS = 5
+
+def needs_retrieval(query: str) -> bool:
+    """
+    Decide whether a query should go through document retrieval.
+    Short conversational turns such as greetings or thanks are answered without it.
+    
+    Args:
+        query: The user's message
+        
+    Returns:
+        bool: True if the query should be answered from the documents, False otherwise
+    """
+    query = query.strip()
+    if len(query.split()) > MAX_CONVERSATIONAL_WORDS:
+        return True
+        
+    return not CONVERSATIONAL_PATTERN.match(query)
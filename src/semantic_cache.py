@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+import numpy as np
+import faiss
+from src.config import Config
+
+class SemanticCache:
+    """
+    Caches chat responses keyed by query embedding.
+    A query whose embedding is close enough (cosine similarity) to a cached one
+    reuses the cached response, skipping retrieval and the LLM call.
+    """
+    def __init__(self, max_size: int = None):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            max_size: Maximum number of cached entries (defaults to Config.SEMANTIC_CACHE_SIZE)
+        """
+        self.max_size = max_size or Config.SEMANTIC_CACHE_SIZE
+        self.index = None
+        self.entries = OrderedDict()
+        self._next_id = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        """
+        Converts an embedding to a normalized float32 row vector.
+        
+        Args:
+            embedding: The query embedding
+            
+        Returns:
+            np.ndarray: Array of shape (1, d)
+        """
+        vector = np.array([embedding], dtype=np.float32)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def get(self, embedding, threshold: float = None) -> Optional[Dict[str, Any]]:
+        """
+        Looks up the most similar cached query.
+        
+        Args:
+            embedding: The query embedding
+            threshold: Minimum cosine similarity for a hit (defaults to Config.SEMANTIC_CACHE_THRESHOLD)
+            
+        Returns:
+            Optional[Dict[str, Any]]: The cached {query, response, ts} entry, or None on a miss
+        """
+        if threshold is None:
+            threshold = Config.SEMANTIC_CACHE_THRESHOLD
+            
+        if self.index is None or not self.entries:
+            return None
+            
+        scores, ids = self.index.search(self._normalize(embedding), 1)
+        entry_id = int(ids[0][0])
+        if entry_id == -1 or scores[0][0] < threshold:
+            return None
+            
+        # Mark as most recently used
+        self.entries.move_to_end(entry_id)
+        entry = self.entries[entry_id]
+        entry["ts"] = time.time()
+        return entry
+
+    def put(self, embedding, query: str, response: str):
+        """
+        Stores a response, evicting the least recently used entry when full.
+        
+        Args:
+            embedding: The query embedding
+            query: The user's question
+            response: The generated response
+        """
+        vector = self._normalize(embedding)
+        if self.index is None:
+            self.index = faiss.IndexIDMap(faiss.IndexFlatIP(vector.shape[1]))
+            
+        while len(self.entries) >= self.max_size:
+            evicted_id, _ = self.entries.popitem(last=False)
+            self.index.remove_ids(np.array([evicted_id], dtype=np.int64))
+            
+        entry_id = self._next_id
+        self._next_id += 1
+        self.index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+        self.entries[entry_id] = {"query": query, "response": response, "ts": time.time()}
+
+    def clear(self):
+        """
+        Removes all cached entries.
+        """
+        self.index = None
+        self.entries.clear()